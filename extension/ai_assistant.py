@@ -11,15 +11,23 @@ and apply results in a two-step workflow.
 
 import sys
 import os
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import uno
 import unohelper
 from com.sun.star.task import XJobExecutor
 from com.sun.star.awt import XActionListener, XTopWindowListener, XItemListener
+from com.sun.star.awt import XCallback
 from com.sun.star.awt import MessageBoxButtons as MSG_BUTTONS
 from com.sun.star.awt.PosSize import POS, SIZE, POSSIZE
 from com.sun.star.awt.PushButtonType import OK, CANCEL
 
+_ERRORBOX = uno.Enum("com.sun.star.awt.MessageBoxType", "ERRORBOX")
+
 # Add pythonpath to sys.path
+@functools.lru_cache(maxsize=None)
 def _ensure_pythonpath():
     try:
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -29,22 +37,131 @@ def _ensure_pythonpath():
     except Exception:
         pass
 
-_ensure_pythonpath()
 
-from ollama_client import generate as ai_generate, BACKENDS
-from prompts import build_prompt
+# Backend client and prompt builder, imported on first use: LibreOffice
+# instantiates this component when the menu loads, long before any action.
+_ollama_client = None
+_build_prompt = None
+
+
+def _llm():
+    """Return (ollama_client module, build_prompt), importing on first use."""
+    global _ollama_client, _build_prompt
+    if _ollama_client is None:
+        _ensure_pythonpath()
+        import ollama_client
+        from prompts import build_prompt
+        _ollama_client = ollama_client
+        _build_prompt = build_prompt
+    return _ollama_client, _build_prompt
+
+
+# ---------- Background work ----------
+# AI requests run off the UNO event thread so the dialog stays responsive.
+_executor = ThreadPoolExecutor(max_workers=4)
+
+# Streamed tokens are batched into windows of this length (seconds)
+# so the preview is not updated once per token.
+_STREAM_FLUSH_S = 0.05
+
+# Selections longer than _CHUNK_MIN_WORDS are split into paragraph chunks
+# that are sent to the backend in parallel (actions in _CHUNKED_ACTIONS).
+_CHUNK_MIN_WORDS = 1500
+_CHUNK_WORDS = 600
+_CHUNKED_ACTIONS = {"summarize", "simplify", "grammar", "rewrite", "translate"}
+
+# Selections shorter than this (in characters) are generated speculatively
+# as soon as the action or tone changes, before Generate is clicked.
+_SPECULATE_MAX_CHARS = 2000
+
+
+def _word_count(text):
+    """Number of whitespace-separated words in text."""
+    return len(text.split())
+
+
+def _chunk_text(text, target_words=_CHUNK_WORDS):
+    """Split text on paragraph boundaries into chunks of ~target_words."""
+    chunks = []
+    current = []
+    size = 0
+    for para in text.split("\n"):
+        para_words = _word_count(para)
+        if current and size + para_words > target_words:
+            chunks.append("\n".join(current))
+            current = []
+            size = 0
+        current.append(para)
+        size += para_words
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class _UICallback(unohelper.Base, XCallback):
+    """Runs a Python callable on the LibreOffice main thread."""
+
+    def __init__(self, fn):
+        self._fn = fn
+
+    def notify(self, data):
+        self._fn()
+
+
+def _post_to_ui(ctx, fn):
+    """Schedule fn() to run on the main thread via AsyncCallback."""
+    async_callback = ctx.ServiceManager.createInstanceWithContext(
+        "com.sun.star.awt.AsyncCallback", ctx)
+    async_callback.addCallback(_UICallback(fn), None)
+
+
+# ---------- Radio button name -> value ----------
+_ACTION_RADIOS = {
+    "action_rewrite": "rewrite",
+    "action_summarize": "summarize",
+    "action_grammar": "grammar",
+    "action_translate": "translate",
+    "action_continue": "continue",
+    "action_simplify": "simplify",
+    "action_custom": "custom",
+}
+
+_TONE_RADIOS = {
+    "tone_formal": "Formal",
+    "tone_concise": "Concise",
+    "tone_academic": "Academic",
+}
+
+# Status text shown while an action runs
+_ACTION_LABELS = {
+    "rewrite": "Rewriting", "summarize": "Summarizing",
+    "grammar": "Fixing grammar in", "translate": "Translating",
+    "continue": "Continuing", "simplify": "Simplifying",
+    "custom": "Processing",
+}
+
+# Instructions label per action (default: "Additional instructions")
+_INSTRUCTION_HINTS = {
+    "translate": "Target language (e.g. Spanish, German, Japanese):",
+    "continue": "Direction for continuation (optional):",
+    "custom": "Your prompt / instructions:",
+}
 
 
 # ---------- Global references to keep modeless dialog alive ----------
 _g_dialog = None
 _g_handler = None
-_g_close_listener = None
 _g_action_listener = None
+_g_tone_listener = None
 
 
 def _close_dialog():
     """Close and dispose the global dialog."""
-    global _g_dialog, _g_handler, _g_close_listener, _g_action_listener
+    global _g_dialog, _g_handler, _g_action_listener, _g_tone_listener
+    if _g_handler is not None:
+        _g_handler._cancel_generation()
+        _g_handler._cancel_speculation()
+        _g_handler._ctrl.clear()  # shared with the radio listeners
     if _g_dialog is not None:
         try:
             _g_dialog.setVisible(False)
@@ -53,8 +170,8 @@ def _close_dialog():
             pass
     _g_dialog = None
     _g_handler = None
-    _g_close_listener = None
     _g_action_listener = None
+    _g_tone_listener = None
 
 
 class _CloseListener(unohelper.Base, XTopWindowListener):
@@ -70,182 +187,173 @@ class _CloseListener(unohelper.Base, XTopWindowListener):
     def disposing(self, event): pass
 
 
+# Stateless, so one instance serves every dialog opened in this process
+_CLOSE_LISTENER = _CloseListener()
+
+
 class _ActionRadioListener(unohelper.Base, XItemListener):
     """Updates Tone and instructions label based on selected action."""
 
-    def __init__(self, dialog):
-        self._dialog = dialog
-
-    def _get_selected_action(self):
-        for name, action in (("action_rewrite", "rewrite"),
-                             ("action_summarize", "summarize"),
-                             ("action_grammar", "grammar"),
-                             ("action_translate", "translate"),
-                             ("action_continue", "continue"),
-                             ("action_simplify", "simplify"),
-                             ("action_custom", "custom")):
-            if self._dialog.getControl(name).getState():
-                return action
-        return "rewrite"
+    def __init__(self, ctrl, handler):
+        self._ctrl = ctrl
+        self._handler = handler
+        self._last_source = "action_rewrite"  # selected in the layout
 
     def itemStateChanged(self, event):
-        action = self._get_selected_action()
+        name = event.Source.getModel().Name
+        if name == self._last_source:
+            return  # no change (or the previous radio being deselected)
+        if not event.Source.getState():
+            return  # the radio that was just deselected
+        self._last_source = name
+        action = _ACTION_RADIOS.get(name, "rewrite")
+        self._handler._selected_action = action
         is_rewrite = (action == "rewrite")
 
         # Tone only for Rewrite
-        for name in ("tone_formal", "tone_concise", "tone_academic"):
-            self._dialog.getControl(name).getModel().Enabled = is_rewrite
-        grp = self._dialog.getControl("tone_group")
+        for tone_name in _TONE_RADIOS:
+            self._ctrl[tone_name].getModel().Enabled = is_rewrite
+        grp = self._ctrl["tone_group"]
         grp.getModel().Label = "Tone" if is_rewrite else "Tone (only for Rewrite)"
 
         # Update instructions label based on action
-        lbl = self._dialog.getControl("custom_label")
-        hints = {
-            "translate": "Target language (e.g. Spanish, German, Japanese):",
-            "continue": "Direction for continuation (optional):",
-            "custom": "Your prompt / instructions:",
-        }
-        lbl.setText(hints.get(action,
-                              "Additional instructions (optional):"))
+        lbl = self._ctrl["custom_label"]
+        lbl.setText(_INSTRUCTION_HINTS.get(
+            action, "Additional instructions (optional):"))
+
+        try:
+            self._handler._speculate()
+        except Exception:
+            pass  # speculation is best effort; Generate reports errors
 
     def disposing(self, event):
         pass
 
 
-# ---------- Dialog handler ----------
-
-class _DialogHandler(unohelper.Base, XActionListener):
-    """Handles button clicks in the AI Assistant dialog."""
+class _ToneRadioListener(unohelper.Base, XItemListener):
+    """Records the selected tone on the dialog handler."""
 
-    def __init__(self, dialog, ctx):
-        self._dialog = dialog
-        self._ctx = ctx
-        self._last_output = ""
-        self._selection_text = ""
-        self._saved_cursor = None  # persistent ref to selected range
-        self._last_action = ""     # action used during last Generate
+    def __init__(self, handler):
+        self._handler = handler
 
-    # -- XActionListener --
-    def actionPerformed(self, event):
-        name = event.Source.getModel().Name
-        if name == "generate_btn":
-            self._on_generate()
-        elif name == "apply_btn":
-            self._on_apply()
-        elif name == "close_btn":
-            _close_dialog()
-        elif name == "refresh_btn":
-            self._on_refresh_selection()
+    def itemStateChanged(self, event):
+        if not event.Source.getState():
+            return
+        tone = _TONE_RADIOS.get(event.Source.getModel().Name, "Formal")
+        self._handler._selected_tone = tone
+        try:
+            self._handler._speculate()
+        except Exception:
+            pass  # speculation is best effort; Generate reports errors
 
     def disposing(self, event):
         pass
 
-    # -- helpers --
-    def _set_status(self, text):
-        self._dialog.getControl("status_label").setText(text)
 
-    def _set_preview(self, text):
-        self._dialog.getControl("preview_box").setText(text)
+# ---------- Writer document helpers ----------
 
-    def _get_action(self):
-        for name, action in (("action_summarize", "summarize"),
-                             ("action_grammar", "grammar"),
-                             ("action_translate", "translate"),
-                             ("action_continue", "continue"),
-                             ("action_simplify", "simplify"),
-                             ("action_custom", "custom")):
-            if self._dialog.getControl(name).getState():
-                return action
-        return "rewrite"
+def _range_string(selection, index):
+    """Text of one range in a multi-range selection ("" if unreadable)."""
+    try:
+        return selection.getByIndex(index).getString()
+    except Exception:
+        return ""
 
-    def _get_custom_instructions(self):
-        return self._dialog.getControl("custom_box").getText().strip()
 
-    def _get_backend(self):
-        if self._dialog.getControl("backend_lmstudio").getState():
-            return "lmstudio"
-        return "ollama"
+class _WriterOps:
+    """Selection helpers shared by the quick menu actions and the dialog.
 
-    def _get_tone(self):
-        if self._dialog.getControl("tone_concise").getState():
-            return "Concise"
-        if self._dialog.getControl("tone_academic").getState():
-            return "Academic"
-        return "Formal"
-
-    def _get_output_mode(self):
-        ctrl = self._dialog.getControl("output_comment")
-        return "comment" if ctrl.getState() else "replace"
+    saved_cursor remembers the range read by
+    get_selection_text(save_cursor=True), so a later replace or comment
+    still works after the dialog has taken focus.
+    """
 
-    def _get_selection_text(self, save_cursor=False):
+    def __init__(self, ctx):
+        self.desktop = ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", ctx)
+        self._doc_cache = (None, False)  # (component, is Writer document)
+        self.saved_cursor = None  # persistent ref to selected range
+
+    def writer_doc(self):
+        """Return the current component if it is a Writer document.
+
+        The type check is cached until the current component changes.
+        """
+        doc = self.desktop.getCurrentComponent()
+        cached_doc, is_writer = self._doc_cache
+        if cached_doc is None or doc != cached_doc:
+            is_writer = doc is not None and hasattr(doc, "Text")
+            self._doc_cache = (doc, is_writer)
+        return doc if is_writer else None
+
+    def get_selection_text(self, save_cursor=False, first_range_only=False):
         """Read selected text from the Writer document.
         If save_cursor=True, store a persistent TextCursor so Apply works
-        even after the selection is lost (when dialog gets focus)."""
+        even after the selection is lost (when dialog gets focus).
+        If first_range_only=True, read just the first range of a
+        multi-range selection, which is the one replace_selection writes."""
         try:
-            desktop = self._ctx.ServiceManager.createInstanceWithContext(
-                "com.sun.star.frame.Desktop", self._ctx)
-            doc = desktop.getCurrentComponent()
-            if not doc or not hasattr(doc, "Text"):
+            doc = self.writer_doc()
+            if not doc:
                 return ""
             selection = doc.CurrentController.getSelection()
             if selection and hasattr(selection, "getCount") and selection.getCount() > 0:
+                count = 1 if first_range_only else selection.getCount()
                 parts = []
-                for i in range(selection.getCount()):
-                    try:
-                        parts.append(selection.getByIndex(i).getString())
-                    except Exception:
-                        pass
-                text = "\n".join(p for p in parts if p)
+                for i in range(count):
+                    part = _range_string(selection, i)
+                    if part:
+                        parts.append(part)
+                text = "\n".join(parts)
+                if save_cursor:
+                    # Forget the target of an earlier Generate; Apply falls
+                    # back to the current selection when none is saved.
+                    self.saved_cursor = None
                 if save_cursor and text.strip():
                     rng = selection.getByIndex(0)
-                    self._saved_cursor = rng.getText().createTextCursorByRange(rng)
+                    self.saved_cursor = rng.getText().createTextCursorByRange(rng)
                 return text
         except Exception:
             pass
         return ""
 
-    def _replace_selection(self, new_text):
+    def replace_selection(self, new_text):
         """Replace text using the saved cursor (survives focus changes)."""
-        if self._saved_cursor:
-            self._saved_cursor.setString(new_text)
-            self._saved_cursor = None
+        if self.saved_cursor:
+            self.saved_cursor.setString(new_text)
+            self.saved_cursor = None
             return
         # Fallback: try current selection
-        desktop = self._ctx.ServiceManager.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", self._ctx)
-        doc = desktop.getCurrentComponent()
-        if doc and hasattr(doc, "Text"):
-            selection = doc.CurrentController.getSelection()
-            if selection and selection.getCount() > 0:
-                selection.getByIndex(0).setString(new_text)
+        doc = self.writer_doc()
+        if not doc:
+            return
+        selection = doc.CurrentController.getSelection()
+        if selection and selection.getCount() > 0:
+            selection.getByIndex(0).setString(new_text)
 
-    def _append_after_selection(self, new_text):
+    def append_after_selection(self, new_text):
         """Insert text right after the saved cursor (for Continue action)."""
-        if self._saved_cursor:
-            cursor = self._saved_cursor.getText().createTextCursorByRange(
-                self._saved_cursor)
+        if self.saved_cursor:
+            cursor = self.saved_cursor.getText().createTextCursorByRange(
+                self.saved_cursor)
             cursor.collapseToEnd()
             cursor.getText().insertString(cursor, " " + new_text, False)
-            self._saved_cursor = None
+            self.saved_cursor = None
             return
         # Fallback: insert at current cursor position
-        desktop = self._ctx.ServiceManager.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", self._ctx)
-        doc = desktop.getCurrentComponent()
-        if doc and hasattr(doc, "Text"):
+        doc = self.writer_doc()
+        if doc:
             view_cursor = doc.CurrentController.getViewCursor()
             text = doc.getText()
             text.insertString(view_cursor, " " + new_text, False)
 
-    def _insert_comment(self, comment_text):
+    def insert_comment(self, comment_text):
         """Insert an annotation using saved cursor or current selection."""
-        desktop = self._ctx.ServiceManager.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", self._ctx)
-        doc = desktop.getCurrentComponent()
-        if not doc or not hasattr(doc, "Text"):
+        doc = self.writer_doc()
+        if not doc:
             return
         # Use saved cursor if available, otherwise current selection
-        text_range = self._saved_cursor
+        text_range = self.saved_cursor
         if not text_range:
             selection = doc.CurrentController.getSelection()
             if selection and selection.getCount() > 0:
@@ -265,21 +373,94 @@ class _DialogHandler(unohelper.Base, XActionListener):
             cursor.collapseToEnd()
             cursor.getText().insertString(
                 cursor, f" ({comment_text})", False)
-        self._saved_cursor = None
+        self.saved_cursor = None
+
+
+# ---------- Dialog handler ----------
+
+class _DialogHandler(unohelper.Base, XActionListener):
+    """Handles button clicks in the AI Assistant dialog."""
+
+    def __init__(self, ctrl, ctx):
+        self._ctrl = ctrl  # control name -> control, filled at dialog open
+        self._ctx = ctx
+        self.ops = _WriterOps(ctx)
+        self._last_output = ""
+        self._selection_text = ""
+        self._last_sel_hash = None  # hash of text in the selection display
+        self._last_refresh_ns = 0   # time of the last Refresh (monotonic)
+        self._last_action = ""     # action used during last Generate
+        self._selected_action = "rewrite"  # kept current by radio listeners
+        self._selected_tone = "Formal"
+        self._in_flight_future = None  # pending background Generate
+        self._cancel_event = None      # set to abort the running stream
+        self._speculative_key = None   # options the speculative run used
+        self._speculative_future = None
+        self._speculative_event = None
+        self._speculative_preview = None  # set once Generate adopts it
+
+    # -- XActionListener --
+    def actionPerformed(self, event):
+        name = event.Source.getModel().Name
+        if name == "generate_btn":
+            self._on_generate()
+        elif name == "apply_btn":
+            self._on_apply()
+        elif name == "close_btn":
+            _close_dialog()
+        elif name == "refresh_btn":
+            self._on_refresh_selection()
+
+    def disposing(self, event):
+        pass
+
+    # -- helpers --
+    def _set_status(self, text):
+        self._ctrl["status_label"].setText(text)
+
+    def _set_preview(self, text):
+        self._ctrl["preview_box"].setText(text)
+
+    def _append_preview_token(self, text, cancel_event):
+        """Append streamed text to the preview (runs on main thread)."""
+        if cancel_event is not self._cancel_event or cancel_event.is_set():
+            return
+        model = self._ctrl["preview_box"].getModel()
+        model.Text += text
+
+    def _get_action(self):
+        return self._selected_action
+
+    def _get_custom_instructions(self):
+        return self._ctrl["custom_box"].getText().strip()
+
+    def _get_backend(self):
+        if self._ctrl["backend_lmstudio"].getState():
+            return "lmstudio"
+        return "ollama"
+
+    def _get_tone(self):
+        return self._selected_tone
+
+    def _get_output_mode(self):
+        ctrl = self._ctrl["output_comment"]
+        return "comment" if ctrl.getState() else "replace"
 
     def _update_selection_display(self, text):
         """Update the selection preview and word count."""
-        sel_ctrl = self._dialog.getControl("selection_box")
-        info_ctrl = self._dialog.getControl("selection_info")
+        sel_hash = hash(text)
+        if sel_hash == self._last_sel_hash:
+            return  # unchanged since the last refresh
+        self._last_sel_hash = sel_hash
+
+        sel_ctrl = self._ctrl["selection_box"]
+        info_ctrl = self._ctrl["selection_info"]
 
         if text.strip():
             # Show a truncated preview
-            preview = text[:300]
-            if len(text) > 300:
-                preview += "..."
-            sel_ctrl.setText(preview)
-            words = len(text.split())
             chars = len(text)
+            sel_ctrl.setText(text[:300] + ("..." if chars > 300 else ""))
+            words = _word_count(text)
             info_ctrl.setText(f"{words} words, {chars} characters selected")
         else:
             sel_ctrl.setText("")
@@ -288,7 +469,11 @@ class _DialogHandler(unohelper.Base, XActionListener):
     # -- button handlers --
     def _on_refresh_selection(self):
         """Refresh the selected text display."""
-        text = self._get_selection_text()
+        now = time.monotonic_ns()
+        if now - self._last_refresh_ns < 100_000_000:
+            return  # ignore repeat refreshes within 100 ms
+        self._last_refresh_ns = now
+        text = self.ops.get_selection_text()
         self._selection_text = text
         self._update_selection_display(text)
         if text.strip():
@@ -296,10 +481,122 @@ class _DialogHandler(unohelper.Base, XActionListener):
         else:
             self._set_status("No text selected.")
 
+    def _set_error_status(self, err):
+        err_msg = str(err)
+        if "timed out" in err_msg.lower():
+            self._set_status("Timed out — try shorter text or check your AI server")
+        elif "failed to reach" in err_msg.lower():
+            self._set_status("Cannot reach AI server — is it running?")
+        else:
+            self._set_status(f"Error: {err_msg[:60]}")
+
+    def _cancel_generation(self):
+        """Abort the pending Generate so its result is never shown."""
+        future = self._in_flight_future
+        self._in_flight_future = None
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+        if future is not None:
+            future.cancel()
+
+    def _cancel_speculation(self):
+        """Abort the speculative run, if any."""
+        if self._speculative_event is not None:
+            self._speculative_event.set()
+            self._speculative_future.cancel()
+        self._speculative_key = None
+        self._speculative_future = None
+        self._speculative_event = None
+        self._speculative_preview = None
+
+    def _speculate(self):
+        """Start generating for the current options ahead of Generate.
+
+        Called when the action or tone changes. _on_generate picks up the
+        running result if nothing else changed in the meantime.
+        """
+        text = self._selection_text
+        if (not text.strip() or len(text) >= _SPECULATE_MAX_CHARS
+                or self._in_flight_future is not None):
+            return
+        action = self._get_action()
+        tone = self._get_tone()
+        custom = self._get_custom_instructions()
+        if not custom and action in ("custom", "translate"):
+            return  # instructions / language are usually typed next
+        backend = self._get_backend()
+        key = (action, tone, backend, hash(text), hash(custom))
+        if key == self._speculative_key:
+            return
+        self._cancel_speculation()
+        _, build_prompt = _llm()
+        prompt = build_prompt(action, tone, text, custom)
+        cancel_event = threading.Event()
+        preview = threading.Event()
+        self._speculative_key = key
+        self._speculative_event = cancel_event
+        self._speculative_preview = preview
+        self._speculative_future = _executor.submit(
+            self._stream_generate, prompt, backend, cancel_event, preview)
+
+    def _stream_generate(self, prompt, backend, cancel_event, preview=None):
+        """Stream a response, posting batched tokens to the preview.
+
+        Runs on a worker thread. Returns the full text, or None if the
+        stream was cancelled. If preview is a threading.Event, tokens are
+        only collected until it is set, then posted from the start.
+        """
+        parts = []
+        pending = []
+        last_flush = time.monotonic()
+        client, _ = _llm()
+        for piece in client.generate_stream(prompt, backend=backend):
+            if cancel_event.is_set():
+                return None
+            parts.append(piece)
+            pending.append(piece)
+            now = time.monotonic()
+            if ((preview is None or preview.is_set())
+                    and now - last_flush >= _STREAM_FLUSH_S):
+                chunk = "".join(pending)
+                pending = []
+                last_flush = now
+                _post_to_ui(
+                    self._ctx,
+                    lambda chunk=chunk: self._append_preview_token(
+                        chunk, cancel_event))
+        return "".join(parts)
+
+    def _chunked_generate(self, action, tone, chunks, custom, backend,
+                          cancel_event):
+        """Process chunks of a long selection concurrently (worker thread).
+
+        Summaries are combined with one final summarize pass; other
+        actions are joined in order. Returns None if cancelled.
+        """
+        client, build_prompt = _llm()
+        # A trailing empty paragraph can end up as a chunk of its own;
+        # blank chunks have nothing to process (and build no prompt).
+        prompts = [build_prompt(action, tone, chunk, custom)
+                   for chunk in chunks if chunk.strip()]
+        # Generate again should give a fresh answer, as it does for
+        # streamed selections, so skip the client's result cache.
+        results = client.generate_many(
+            prompts, backend=backend, use_cache=False)
+        if cancel_event.is_set():
+            return None
+        combined = "\n".join(r.strip() for r in results)
+        if action == "summarize":
+            return client.generate(
+                build_prompt(action, tone, combined, custom),
+                backend=backend, use_cache=False)
+        return combined
+
     def _on_generate(self):
         try:
             self._set_status("Reading selection...")
-            text = self._get_selection_text(save_cursor=True)
+            text = self.ops.get_selection_text(save_cursor=True)
             self._selection_text = text
             self._update_selection_display(text)
 
@@ -311,26 +608,76 @@ class _DialogHandler(unohelper.Base, XActionListener):
             action = self._get_action()
             tone = self._get_tone()
             custom = self._get_custom_instructions()
-            words = len(text.split())
-
-            labels = {
-                "rewrite": "Rewriting", "summarize": "Summarizing",
-                "grammar": "Fixing grammar in", "translate": "Translating",
-                "continue": "Continuing", "simplify": "Simplifying",
-                "custom": "Processing",
-            }
+            words = _word_count(text)
+
+            client, build_prompt = _llm()
             backend = self._get_backend()
-            backend_label = BACKENDS[backend]["label"]
-            self._set_status(
-                f"{labels.get(action, 'Processing')} {words} words "
-                f"via {backend_label}...")
-            prompt = build_prompt(action, tone, text, custom)
-            result = ai_generate(prompt, backend=backend)
+            backend_label = client.BACKENDS[backend]["label"]
+            label = _ACTION_LABELS.get(action, "Processing")
+
+            self._cancel_generation()
+            self._set_preview("")
+            key = (action, tone, backend, hash(text), hash(custom))
+            speculative = None
+            if key == self._speculative_key:
+                fut = self._speculative_future
+                # A run that already failed (e.g. the backend was down
+                # then) is not reused; Generate asks the backend again.
+                if not fut.done() or (not fut.cancelled()
+                                      and fut.exception() is None):
+                    speculative = fut
+                    cancel_event = self._speculative_event
+                    self._speculative_preview.set()  # show its tokens
+                    self._speculative_key = None
+                    self._speculative_future = None
+                    self._speculative_event = None
+                    self._speculative_preview = None
+            if speculative is None:
+                self._cancel_speculation()
+                cancel_event = threading.Event()
+            chunks = None
+            if words > _CHUNK_MIN_WORDS and action in _CHUNKED_ACTIONS:
+                chunks = _chunk_text(text)
+            if speculative is not None:
+                # Already started when the options changed
+                self._set_status(
+                    f"{label} {words} words via {backend_label}...")
+                future = speculative
+            elif chunks and len(chunks) > 1:
+                self._set_status(
+                    f"{label} {len(chunks)} chunks in parallel "
+                    f"via {backend_label}...")
+                future = _executor.submit(
+                    self._chunked_generate, action, tone, chunks, custom,
+                    backend, cancel_event)
+            else:
+                self._set_status(
+                    f"{label} {words} words via {backend_label}...")
+                prompt = build_prompt(action, tone, text, custom)
+                future = _executor.submit(
+                    self._stream_generate, prompt, backend, cancel_event)
+            self._in_flight_future = future
+            self._cancel_event = cancel_event
+            future.add_done_callback(
+                lambda f: _post_to_ui(
+                    self._ctx, lambda: self._on_generate_done(f, action)))
+        except Exception as e:
+            self._set_error_status(e)
+            self._last_output = ""
+
+    def _on_generate_done(self, future, action):
+        """Show the result of a background Generate (runs on main thread)."""
+        if future is not self._in_flight_future:
+            return  # superseded by a newer Generate or dialog closed
+        self._in_flight_future = None
+        self._cancel_event = None
+        try:
+            result = future.result()
             self._last_action = action
             self._last_output = result
             self._set_preview(result)
 
-            result_words = len(result.split())
+            result_words = _word_count(result)
             if action == "continue":
                 self._set_status(
                     f"Done! {result_words} words generated. "
@@ -339,32 +686,26 @@ class _DialogHandler(unohelper.Base, XActionListener):
                 self._set_status(
                     f"Done! {result_words} words generated. Click Apply to use.")
         except Exception as e:
-            err_msg = str(e)
-            if "timed out" in err_msg.lower():
-                self._set_status("Timed out — try shorter text or check your AI server")
-            elif "failed to reach" in err_msg.lower():
-                self._set_status("Cannot reach AI server — is it running?")
-            else:
-                self._set_status(f"Error: {err_msg[:60]}")
+            self._set_error_status(e)
             self._last_output = ""
 
     def _on_apply(self):
         try:
             # Read whatever is in the preview box (user may have edited it)
-            apply_text = self._dialog.getControl("preview_box").getText()
+            apply_text = self._ctrl["preview_box"].getText()
             if not apply_text.strip():
                 self._set_status("Nothing to apply — Generate first")
                 return
 
             mode = self._get_output_mode()
             if mode == "comment":
-                self._insert_comment(apply_text)
+                self.ops.insert_comment(apply_text)
                 self._set_status("Inserted as comment!")
             elif self._last_action == "continue":
-                self._append_after_selection(apply_text)
+                self.ops.append_after_selection(apply_text)
                 self._set_status("Text appended after selection!")
             else:
-                self._replace_selection(apply_text)
+                self.ops.replace_selection(apply_text)
                 self._set_status("Selection replaced!")
             # Clear preview after applying
             self._set_preview("")
@@ -372,6 +713,157 @@ class _DialogHandler(unohelper.Base, XActionListener):
             self._set_status(f"Error applying: {str(e)[:60]}")
 
 
+# ---------- Dialog layout ----------
+
+_DLG_W = 250
+
+_MODEL_TYPES = {
+    "groupbox": "com.sun.star.awt.UnoControlGroupBoxModel",
+    "radio": "com.sun.star.awt.UnoControlRadioButtonModel",
+    "button": "com.sun.star.awt.UnoControlButtonModel",
+    "label": "com.sun.star.awt.UnoControlFixedTextModel",
+    "multiline": "com.sun.star.awt.UnoControlEditModel",
+    "separator": "com.sun.star.awt.UnoControlFixedLineModel",
+}
+
+
+def _build_layout():
+    """Compute the dialog controls once.
+
+    Returns (layout, height) where layout is a list of
+    (kind, name, prop_names, prop_values) with the property names sorted,
+    as XMultiPropertySet.setPropertyValues() expects.
+    """
+    layout = []
+
+    def add(kind, name, x, y, w, h, **props):
+        props.update(Name=name, PositionX=x, PositionY=y, Width=w, Height=h)
+        names = tuple(sorted(props))
+        layout.append((kind, name, names, tuple(props[n] for n in names)))
+
+    def add_groupbox(name, label, x, y, w, h):
+        add("groupbox", name, x, y, w, h, Label=label)
+
+    def add_radio(name, label, x, y, w=70, h=12, selected=False):
+        if selected:
+            add("radio", name, x, y, w, h, Label=label, State=1)
+        else:
+            add("radio", name, x, y, w, h, Label=label)
+
+    def add_button(name, label, x, y, w=65, h=16):
+        add("button", name, x, y, w, h, Label=label)
+
+    def add_label(name, label, x, y, w=210, h=10):
+        add("label", name, x, y, w, h, Label=label)
+
+    def add_multiline(name, x, y, w=210, h=50, readonly=True):
+        add("multiline", name, x, y, w, h,
+            MultiLine=True, ReadOnly=readonly, VScroll=True)
+
+    def add_separator(name, x, y, w):
+        add("separator", name, x, y, w, 1, Orientation=0)  # horizontal
+
+    # ---- layout ----
+    X = 8
+    W = _DLG_W - 16  # content width with margin
+    Y = 4
+
+    # == Section 0: Backend selector ==
+    add_groupbox("backend_group", "AI Backend", X, Y, W, 24)
+    add_radio("backend_ollama", "Ollama", X + 8, Y + 12, 60,
+              selected=True)
+    add_radio("backend_lmstudio", "LM Studio", X + 75, Y + 12, 70)
+    Y += 28
+
+    # == Section 1: Selected Text ==
+    add_label("sel_title", "Selected Text:", X, Y, W, 10)
+    Y += 12
+    add_multiline("selection_box", X, Y, W, 36, readonly=True)
+    Y += 38
+    add_label("selection_info", "No text selected", X, Y, W - 65, 10)
+    add_button("refresh_btn", "Refresh", X + W - 60, Y - 2, 60, 14)
+    Y += 14
+
+    add_separator("sep1", X, Y, W)
+    Y += 4
+
+    # == Section 2: Action ==
+    add_groupbox("action_group", "Action", X, Y, W, 48)
+    # Row 1
+    r1y = Y + 12
+    add_radio("action_rewrite", "Rewrite", X + 8, r1y, 55,
+              selected=True)
+    add_radio("action_summarize", "Summarize", X + 65, r1y, 55)
+    add_radio("action_grammar", "Grammar Fix", X + 125, r1y, 65)
+    # Row 2
+    r2y = Y + 24
+    add_radio("action_translate", "Translate", X + 8, r2y, 55)
+    add_radio("action_continue", "Continue", X + 65, r2y, 55)
+    add_radio("action_simplify", "Simplify", X + 125, r2y, 55)
+    # Row 3
+    r3y = Y + 36
+    add_radio("action_custom", "Custom Prompt", X + 8, r3y, 80)
+
+    # GroupBox breaks radio group; Tone starts new group
+    Y += 52
+    add_groupbox("tone_group", "Tone", X, Y, W, 24)
+    add_radio("tone_formal", "Formal", X + 8, Y + 12, 50,
+              selected=True)
+    add_radio("tone_concise", "Concise", X + 65, Y + 12, 50)
+    add_radio("tone_academic", "Academic", X + 125, Y + 12, 60)
+
+    Y += 28
+    add_groupbox("output_group", "Output", X, Y, W, 24)
+    add_radio("output_replace", "Replace Selection",
+              X + 8, Y + 12, 90, selected=True)
+    add_radio("output_comment", "Insert as Comment",
+              X + 110, Y + 12, 90)
+
+    Y += 30
+    # == Section: Custom Instructions ==
+    add_label("custom_label",
+              "Additional instructions (optional):", X, Y, W, 10)
+    Y += 12
+    add_multiline("custom_box", X, Y, W, 30, readonly=False)
+    Y += 34
+
+    add_separator("sep2", X, Y, W)
+    Y += 5
+
+    # == Section 3: Buttons ==
+    btn_w = (W - 10) // 3
+    add_button("generate_btn", "Generate", X, Y, btn_w, 18)
+    add_button("apply_btn", "Apply",
+               X + btn_w + 5, Y, btn_w, 18)
+    add_button("close_btn", "Close",
+               X + 2 * (btn_w + 5), Y, btn_w, 18)
+
+    Y += 24
+    add_separator("sep3", X, Y, W)
+    Y += 4
+
+    # == Section 4: Result Preview (editable) ==
+    add_label("preview_label",
+              "Result Preview (edit before applying):", X, Y, W, 10)
+    Y += 12
+    add_multiline("preview_box", X, Y, W, 120, readonly=False)
+
+    Y += 124
+    add_separator("sep4", X, Y, W)
+    Y += 4
+
+    # == Status bar ==
+    add_label("status_label",
+              "Select text in document, then click Generate.",
+              X, Y, W, 12)
+    Y += 16
+
+    return layout, Y
+
+
+_LAYOUT, _DLG_H = _build_layout()
+
+
 # ---------- Main UNO component ----------
 
 class AIAssistant(unohelper.Base, XJobExecutor):
@@ -379,49 +871,17 @@ class AIAssistant(unohelper.Base, XJobExecutor):
 
     def __init__(self, ctx):
         self.ctx = ctx
-
-    # -- text helpers (used by quick menu actions) --
-    def _get_selection_text(self):
-        desktop = self.ctx.ServiceManager.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", self.ctx)
-        doc = desktop.getCurrentComponent()
-        if not hasattr(doc, "Text"):
-            return None
-        selection = doc.CurrentController.getSelection()
-        if selection and selection.getCount() > 0:
-            return selection.getByIndex(0).getString()
-        return None
-
-    def _replace_selection(self, new_text):
-        desktop = self.ctx.ServiceManager.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", self.ctx)
-        doc = desktop.getCurrentComponent()
-        if hasattr(doc, "Text"):
-            selection = doc.CurrentController.getSelection()
-            if selection and selection.getCount() > 0:
-                selection.getByIndex(0).setString(new_text)
-
-    def _insert_comment(self, comment_text):
-        desktop = self.ctx.ServiceManager.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", self.ctx)
-        doc = desktop.getCurrentComponent()
-        if hasattr(doc, "Text"):
-            selection = doc.CurrentController.getSelection()
-            if selection and selection.getCount() > 0:
-                text_range = selection.getByIndex(0)
-                try:
-                    annotation = doc.createInstance(
-                        "com.sun.star.text.TextField.Annotation")
-                    annotation.Content = comment_text
-                    annotation.Author = "AI Assistant"
-                    text_range.getText().insertTextContent(
-                        text_range, annotation, False)
-                except Exception:
-                    cursor = text_range.getText().createTextCursorByRange(
-                        text_range)
-                    cursor.collapseToEnd()
-                    cursor.getText().insertString(
-                        cursor, f" ({comment_text})", False)
+        self.ops = _WriterOps(ctx)
+        self._toolkit_instance = None  # created on first use
+
+    @property
+    def _toolkit(self):
+        """The awt Toolkit, created only when a window is first needed."""
+        if self._toolkit_instance is None:
+            self._toolkit_instance = (
+                self.ctx.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.awt.Toolkit", self.ctx))
+        return self._toolkit_instance
 
     def _show_choice_dialog(self, title, message, choices):
         """Show a modal dialog with multiple choice buttons."""
@@ -478,12 +938,9 @@ class AIAssistant(unohelper.Base, XJobExecutor):
             btn_control.addActionListener(
                 ChoiceListener(choice, dialog, result))
 
-        frame = sm.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", ctx).getCurrentFrame()
+        frame = self.ops.desktop.getCurrentFrame()
         window = frame.getContainerWindow() if frame else None
-        dialog.createPeer(
-            sm.createInstanceWithContext(
-                "com.sun.star.awt.Toolkit", ctx), window)
+        dialog.createPeer(self._toolkit, window)
 
         if window:
             ps = window.getPosSize()
@@ -497,12 +954,10 @@ class AIAssistant(unohelper.Base, XJobExecutor):
 
     def _show_error(self, message):
         try:
-            toolkit = self.ctx.ServiceManager.createInstanceWithContext(
-                "com.sun.star.awt.Toolkit", self.ctx)
-            parent = toolkit.getDesktopWindow()
-            msgbox = toolkit.createMessageBox(
+            parent = self._toolkit.getDesktopWindow()
+            msgbox = self._toolkit.createMessageBox(
                 parent,
-                uno.Enum("com.sun.star.awt.MessageBoxType", "ERRORBOX"),
+                _ERRORBOX,
                 MSG_BUTTONS.BUTTONS_OK,
                 "AI Assistant Error",
                 message,
@@ -528,7 +983,7 @@ class AIAssistant(unohelper.Base, XJobExecutor):
 
     # -- quick menu actions --
     def _handle_rewrite(self):
-        text = self._get_selection_text()
+        text = self.ops.get_selection_text(first_range_only=True)
         if not text or not text.strip():
             self._show_error("Please select some text first")
             return
@@ -538,14 +993,15 @@ class AIAssistant(unohelper.Base, XJobExecutor):
         if not tone:
             return
         try:
+            client, build_prompt = _llm()
             prompt = build_prompt("rewrite", tone, text)
-            result = ollama_generate(prompt)
-            self._replace_selection(result)
+            result = client.generate(prompt)
+            self.ops.replace_selection(result)
         except Exception as e:
             self._show_error(str(e))
 
     def _handle_summarize(self):
-        text = self._get_selection_text()
+        text = self.ops.get_selection_text(first_range_only=True)
         if not text or not text.strip():
             self._show_error("Please select some text first")
             return
@@ -555,12 +1011,13 @@ class AIAssistant(unohelper.Base, XJobExecutor):
         if not mode:
             return
         try:
+            client, build_prompt = _llm()
             prompt = build_prompt("summarize", "", text)
-            result = ollama_generate(prompt)
+            result = client.generate(prompt)
             if mode == "Replace":
-                self._replace_selection(result)
+                self.ops.replace_selection(result)
             else:
-                self._insert_comment(result)
+                self.ops.insert_comment(result)
         except Exception as e:
             self._show_error(str(e))
 
@@ -571,7 +1028,7 @@ class AIAssistant(unohelper.Base, XJobExecutor):
 
     def _open_uno_dialog(self):
         """Fallback UNO-based dialog."""
-        global _g_dialog, _g_handler, _g_close_listener, _g_action_listener
+        global _g_dialog, _g_handler, _g_action_listener, _g_tone_listener
 
         if _g_dialog is not None:
             try:
@@ -588,224 +1045,47 @@ class AIAssistant(unohelper.Base, XJobExecutor):
         sm = ctx.getServiceManager()
 
         # ---- build dialog model ----
-        DLG_W = 250
         model = sm.createInstanceWithContext(
             "com.sun.star.awt.UnoControlDialogModel", ctx)
-        model.Width = DLG_W
+        model.Width = _DLG_W
+        model.Height = _DLG_H
         model.Title = "AI Assistant"
 
-        # -- helper functions --
-        def add_groupbox(name, label, x, y, w, h):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlGroupBoxModel")
-            m.Name = name
-            m.Label = label
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = h
-            model.insertByName(name, m)
-
-        def add_radio(name, label, x, y, w=70, h=12, selected=False):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlRadioButtonModel")
-            m.Name = name
-            m.Label = label
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = h
-            if selected:
-                m.State = 1
-            model.insertByName(name, m)
-
-        def add_button(name, label, x, y, w=65, h=16):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlButtonModel")
-            m.Name = name
-            m.Label = label
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = h
-            model.insertByName(name, m)
-
-        def add_label(name, label, x, y, w=210, h=10):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlFixedTextModel")
-            m.Name = name
-            m.Label = label
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = h
+        for kind, name, prop_names, prop_values in _LAYOUT:
+            m = model.createInstance(_MODEL_TYPES[kind])
+            m.setPropertyValues(prop_names, prop_values)
             model.insertByName(name, m)
 
-        def add_multiline(name, x, y, w=210, h=50, readonly=True):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlEditModel")
-            m.Name = name
-            m.MultiLine = True
-            m.ReadOnly = readonly
-            m.VScroll = True
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = h
-            model.insertByName(name, m)
-
-        def add_separator(name, x, y, w):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlFixedLineModel")
-            m.Name = name
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = 1
-            m.Orientation = 0  # horizontal
-            model.insertByName(name, m)
-
-        def add_listbox(name, items, x, y, w, h, selected=0):
-            m = model.createInstance(
-                "com.sun.star.awt.UnoControlListBoxModel")
-            m.Name = name
-            m.PositionX = x
-            m.PositionY = y
-            m.Width = w
-            m.Height = h
-            m.Dropdown = True
-            m.LineCount = len(items)
-            m.StringItemList = tuple(items)
-            model.insertByName(name, m)
-
-        # ---- layout ----
-        X = 8
-        W = DLG_W - 16  # content width with margin
-        Y = 4
-
-        # == Section 0: Backend selector ==
-        add_groupbox("backend_group", "AI Backend", X, Y, W, 24)
-        add_radio("backend_ollama", "Ollama", X + 8, Y + 12, 60,
-                  selected=True)
-        add_radio("backend_lmstudio", "LM Studio", X + 75, Y + 12, 70)
-        Y += 28
-
-        # == Section 1: Selected Text ==
-        add_label("sel_title", "Selected Text:", X, Y, W, 10)
-        Y += 12
-        add_multiline("selection_box", X, Y, W, 36, readonly=True)
-        Y += 38
-        add_label("selection_info", "No text selected", X, Y, W - 65, 10)
-        add_button("refresh_btn", "Refresh", X + W - 60, Y - 2, 60, 14)
-        Y += 14
-
-        add_separator("sep1", X, Y, W)
-        Y += 4
-
-        # == Section 2: Action ==
-        add_groupbox("action_group", "Action", X, Y, W, 48)
-        # Row 1
-        r1y = Y + 12
-        add_radio("action_rewrite", "Rewrite", X + 8, r1y, 55,
-                  selected=True)
-        add_radio("action_summarize", "Summarize", X + 65, r1y, 55)
-        add_radio("action_grammar", "Grammar Fix", X + 125, r1y, 65)
-        # Row 2
-        r2y = Y + 24
-        add_radio("action_translate", "Translate", X + 8, r2y, 55)
-        add_radio("action_continue", "Continue", X + 65, r2y, 55)
-        add_radio("action_simplify", "Simplify", X + 125, r2y, 55)
-        # Row 3
-        r3y = Y + 36
-        add_radio("action_custom", "Custom Prompt", X + 8, r3y, 80)
-
-        # GroupBox breaks radio group; Tone starts new group
-        Y += 52
-        add_groupbox("tone_group", "Tone", X, Y, W, 24)
-        add_radio("tone_formal", "Formal", X + 8, Y + 12, 50,
-                  selected=True)
-        add_radio("tone_concise", "Concise", X + 65, Y + 12, 50)
-        add_radio("tone_academic", "Academic", X + 125, Y + 12, 60)
-
-        Y += 28
-        add_groupbox("output_group", "Output", X, Y, W, 24)
-        add_radio("output_replace", "Replace Selection",
-                  X + 8, Y + 12, 90, selected=True)
-        add_radio("output_comment", "Insert as Comment",
-                  X + 110, Y + 12, 90)
-
-        Y += 30
-        # == Section: Custom Instructions ==
-        add_label("custom_label",
-                  "Additional instructions (optional):", X, Y, W, 10)
-        Y += 12
-        add_multiline("custom_box", X, Y, W, 30, readonly=False)
-        Y += 34
-
-        add_separator("sep2", X, Y, W)
-        Y += 5
-
-        # == Section 3: Buttons ==
-        btn_w = (W - 10) // 3
-        add_button("generate_btn", "Generate", X, Y, btn_w, 18)
-        add_button("apply_btn", "Apply",
-                   X + btn_w + 5, Y, btn_w, 18)
-        add_button("close_btn", "Close",
-                   X + 2 * (btn_w + 5), Y, btn_w, 18)
-
-        Y += 24
-        add_separator("sep3", X, Y, W)
-        Y += 4
-
-        # == Section 4: Result Preview (editable) ==
-        add_label("preview_label",
-                  "Result Preview (edit before applying):", X, Y, W, 10)
-        Y += 12
-        add_multiline("preview_box", X, Y, W, 120, readonly=False)
-
-        Y += 124
-        add_separator("sep4", X, Y, W)
-        Y += 4
-
-        # == Status bar ==
-        add_label("status_label",
-                  "Select text in document, then click Generate.",
-                  X, Y, W, 12)
-        Y += 16
-
-        model.Height = Y
-
         # ---- create dialog control ----
         dialog = sm.createInstanceWithContext(
             "com.sun.star.awt.UnoControlDialog", ctx)
         dialog.setModel(model)
+        ctrl = {name: dialog.getControl(name) for _, name, _, _ in _LAYOUT}
 
         # -- attach handlers --
-        handler = _DialogHandler(dialog, self.ctx)
-        dialog.getControl("generate_btn").addActionListener(handler)
-        dialog.getControl("apply_btn").addActionListener(handler)
-        dialog.getControl("close_btn").addActionListener(handler)
-        dialog.getControl("refresh_btn").addActionListener(handler)
+        handler = _DialogHandler(ctrl, self.ctx)
+        ctrl["generate_btn"].addActionListener(handler)
+        ctrl["apply_btn"].addActionListener(handler)
+        ctrl["close_btn"].addActionListener(handler)
+        ctrl["refresh_btn"].addActionListener(handler)
 
         # Action radio listener: update Tone and label on action change
-        action_listener = _ActionRadioListener(dialog)
-        for rname in ("action_rewrite", "action_summarize", "action_grammar",
-                      "action_translate", "action_continue", "action_simplify",
-                      "action_custom"):
-            dialog.getControl(rname).addItemListener(action_listener)
+        action_listener = _ActionRadioListener(ctrl, handler)
+        for rname in _ACTION_RADIOS:
+            ctrl[rname].addItemListener(action_listener)
+
+        # Tone radio listener: keep the handler's selected tone current
+        tone_listener = _ToneRadioListener(handler)
+        for rname in _TONE_RADIOS:
+            ctrl[rname].addItemListener(tone_listener)
 
         # -- show modeless --
-        toolkit = sm.createInstanceWithContext(
-            "com.sun.star.awt.Toolkit", ctx)
-        desktop = sm.createInstanceWithContext(
-            "com.sun.star.frame.Desktop", ctx)
-        frame = desktop.getCurrentFrame()
+        frame = self.ops.desktop.getCurrentFrame()
         parent_window = frame.getContainerWindow() if frame else None
-        dialog.createPeer(toolkit, parent_window)
+        dialog.createPeer(self._toolkit, parent_window)
 
         # listen for X button
-        close_listener = _CloseListener()
-        dialog.addTopWindowListener(close_listener)
+        dialog.addTopWindowListener(_CLOSE_LISTENER)
 
         dialog.setVisible(True)
 
@@ -815,8 +1095,8 @@ class AIAssistant(unohelper.Base, XJobExecutor):
         # keep references alive
         _g_dialog = dialog
         _g_handler = handler
-        _g_close_listener = close_listener
         _g_action_listener = action_listener
+        _g_tone_listener = tone_listener
 
 
 # ---------- UNO component registration ----------
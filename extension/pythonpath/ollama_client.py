@@ -4,9 +4,20 @@
 
 """AI backend client — supports Ollama and LM Studio (OpenAI-compatible)."""
 
+import atexit
+import collections
+import functools
+import gzip
+import hashlib
+import http.client
 import json
+import os
+import random
 import socket
-import urllib.request
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Backend configurations
 BACKENDS = {
@@ -25,41 +36,289 @@ BACKENDS = {
 DEFAULT_BACKEND = "ollama"
 DEFAULT_TIMEOUT_S = 120
 
+# How long Ollama keeps the model loaded after a request, so follow-up
+# actions skip the model load (Ollama's own default is 5 minutes).
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Attempts per request when the backend refuses or drops the connection
+# before answering; set AI_ASSISTANT_RETRIES=1 to fail on the first error.
+try:
+    RETRY_ATTEMPTS = max(1, int(os.environ.get("AI_ASSISTANT_RETRIES", "3")))
+except ValueError:
+    RETRY_ATTEMPTS = 3
+_RETRY_BASE_S = 0.25
+_RETRY_CAP_S = 2.0
+
+# Compress request bodies larger than _GZIP_MIN_BYTES. Off by default:
+# Ollama and LM Studio don't decode compressed requests themselves, so
+# enable AI_ASSISTANT_GZIP_REQUESTS only behind a proxy that does.
+GZIP_REQUESTS = bool(os.environ.get("AI_ASSISTANT_GZIP_REQUESTS"))
+_GZIP_MIN_BYTES = 4096
+
 
 class AIBackendError(Exception):
     pass
 
 
+# ---------- Keep-alive connection pool ----------
+# Idle connections are pooled per server, so repeated requests reuse the
+# socket instead of reconnecting on every action. Any thread may take a
+# pooled connection; at most _POOL_MAXSIZE idle ones are kept per server.
+_POOL_MAXSIZE = 4
+_pool = {}  # (scheme, host, port) -> list of idle connections
+_pool_lock = threading.Lock()
+
+
+def _acquire(key, timeout):
+    """Take an idle connection for key = (scheme, host, port), or open one."""
+    with _pool_lock:
+        idle = _pool.get(key)
+        conn = idle.pop() if idle else None
+    if conn is None:
+        scheme, host, port = key
+        conn_class = (http.client.HTTPSConnection if scheme == "https"
+                      else http.client.HTTPConnection)
+        return conn_class(host, port, timeout=timeout)
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+def _release(key, conn):
+    """Return a connection whose response was fully read to the pool."""
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < _POOL_MAXSIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+@atexit.register
+def _close_pool():
+    with _pool_lock:
+        for idle in _pool.values():
+            for conn in idle:
+                conn.close()
+        _pool.clear()
+
+
+def _network_error(label, exc):
+    """Map a socket or HTTP protocol failure to an AIBackendError."""
+    # socket.timeout is an alias of TimeoutError from Python 3.10 on.
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        return AIBackendError("%s request timed out" % label)
+    return AIBackendError("Failed to reach %s: %s" % (label, exc))
+
+
+# Streamed responses are read line by line as they arrive, so only
+# whole-body responses are offered gzip.
+_JSON_HEADERS = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+_STREAM_HEADERS = {"Content-Type": "application/json"}
+
+
+@functools.lru_cache(maxsize=8)
+def _endpoint(url):
+    """Split a backend URL into its pool key (scheme, host, port) and path."""
+    parts = urllib.parse.urlsplit(url)
+    key = (parts.scheme, parts.hostname,
+           parts.port or (443 if parts.scheme == "https" else 80))
+    return key, parts.path + ("?" + parts.query if parts.query else "")
+
+
+def _post(url, payload, timeout, label, stream=False):
+    """POST payload as JSON over a pooled keep-alive connection.
+
+    payload is a dict, or a body already encoded as JSON bytes. Returns
+    (key, conn, response); pass them to _read(), or close conn if the
+    response is abandoned before it has been read to the end.
+    """
+    if isinstance(payload, bytes):
+        data = payload
+    else:
+        data = json.dumps(payload, separators=(",", ":"),
+                          ensure_ascii=False).encode("utf-8")
+    key, path = _endpoint(url)
+    headers = _STREAM_HEADERS if stream else _JSON_HEADERS
+    if GZIP_REQUESTS and len(data) > _GZIP_MIN_BYTES:
+        data = gzip.compress(data, compresslevel=1)
+        headers = dict(headers, **{"Content-Encoding": "gzip"})
+
+    failures = 0
+    while True:
+        conn = _acquire(key, timeout)
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", path, body=data,
+                         headers=headers)
+            resp = conn.getresponse()
+            break
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            if not isinstance(exc, ConnectionError):
+                raise _network_error(label, exc) from exc
+            if reused:
+                continue  # the server closed an idle keep-alive socket
+            failures += 1
+            if failures >= RETRY_ATTEMPTS:
+                raise _network_error(label, exc) from exc
+        # The backend may be briefly down (starting up, swapping models):
+        # back off with full jitter so several windows don't retry in step.
+        time.sleep(random.uniform(
+            0, min(_RETRY_CAP_S, _RETRY_BASE_S * 2 ** (failures - 1))))
+
+    if resp.status >= 400:
+        raw = _read(key, conn, resp, label)
+        try:
+            message = json.loads(raw.decode("utf-8"))["error"]
+            if isinstance(message, dict):  # OpenAI-style error object
+                message = message.get("message", message)
+        except (ValueError, KeyError, TypeError):
+            message = resp.reason
+        raise AIBackendError(
+            "%s returned HTTP %d: %s" % (label, resp.status, message))
+    return key, conn, resp
+
+
+def _read(key, conn, resp, label):
+    """Read the whole response body and return conn to the pool."""
+    try:
+        raw = resp.read()
+    except (OSError, http.client.HTTPException) as exc:
+        conn.close()
+        raise _network_error(label, exc) from exc
+    _release(key, conn)
+    if resp.getheader("Content-Encoding") == "gzip":
+        try:
+            raw = gzip.decompress(raw)
+        except (OSError, EOFError) as exc:
+            raise AIBackendError(
+                "Invalid compressed response from %s" % label) from exc
+    return raw
+
+
+def _post_json(url, payload, timeout, label):
+    """POST payload and return the decoded JSON response body."""
+    key, conn, resp = _post(url, payload, timeout, label)
+    return json.loads(_read(key, conn, resp, label).decode("utf-8"))
+
+
+def _post_lines(url, payload, timeout, label):
+    """POST payload and yield the non-blank lines of a streamed response."""
+    key, conn, resp = _post(url, payload, timeout, label, stream=True)
+    finished = False
+    try:
+        for line in resp:
+            if not line.isspace():
+                yield line
+        # Iterating stops at the end of a Content-Length body without
+        # closing the response; read() marks it done so the socket can
+        # take another request.
+        resp.read()
+        finished = resp.isclosed()
+    except (OSError, http.client.HTTPException) as exc:
+        raise _network_error(label, exc) from exc
+    finally:
+        if finished:
+            _release(key, conn)
+        else:
+            # Abandoned mid-stream: the socket still holds unread data.
+            conn.close()
+
+
+def _json_str(text):
+    return json.dumps(text, ensure_ascii=False).encode("utf-8")
+
+
+_OLLAMA_TAIL = b',"keep_alive":' + _json_str(OLLAMA_KEEP_ALIVE) + b"}"
+
+
+def _ollama_body(model, prompt, stream):
+    """Encode an /api/generate request body.
+
+    Only the model name and prompt go through the JSON string escaper; the
+    rest of the envelope is fixed bytes.
+    """
+    return b"".join((
+        b'{"model":', _json_str(model),
+        b',"prompt":', _json_str(prompt),
+        b',"stream":true' if stream else b',"stream":false',
+        _OLLAMA_TAIL,
+    ))
+
+
+_RESPONSE_KEY = b'"response":"'
+
+
+def _fast_extract_response(raw):
+    """Return the "response" string of an Ollama reply body, or None.
+
+    The string is located in the raw bytes and only that slice is decoded,
+    skipping the rest of the body (including the long "context" token
+    array). Returns None when the field can't be found, as in an error
+    body, so the caller falls back to json.loads().
+    """
+    start = raw.find(_RESPONSE_KEY)
+    if start < 0:
+        return None
+    start += len(_RESPONSE_KEY)
+    # The closing quote is the first one not escaped by a backslash; in
+    # UTF-8 neither byte can occur inside a multi-byte character.
+    end = raw.find(b'"', start)
+    while end > 0:
+        i = end
+        while i > start and raw[i - 1] == 0x5C:  # backslash
+            i -= 1
+        if (end - i) % 2 == 0:
+            break
+        end = raw.find(b'"', end + 1)
+    if end < 0:
+        return None
+    try:
+        return json.decoder.scanstring(
+            raw[start:end + 1].decode("utf-8"), 0)[0]
+    except ValueError:
+        return None
+
+
 def _call_ollama(prompt, url, model, timeout):
     """Call the Ollama /api/generate endpoint."""
-    payload = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False,
-    }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url, data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            body = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.URLError as exc:
-        raise AIBackendError("Failed to reach Ollama: %s" % exc) from exc
-    except socket.timeout as exc:
-        raise AIBackendError("Ollama request timed out") from exc
-
-    if "error" in body:
-        raise AIBackendError(body["error"])
-
-    text = body.get("response", "")
-    if not text.strip():
+    payload = _ollama_body(model, prompt, stream=False)
+    key, conn, resp = _post(url, payload, timeout, "Ollama")
+    raw = _read(key, conn, resp, "Ollama")
+
+    text = _fast_extract_response(raw)
+    if text is None:
+        body = json.loads(raw.decode("utf-8"))
+        if "error" in body:
+            raise AIBackendError(body["error"])
+        text = body.get("response", "")
+    if not text or text.isspace():
         raise AIBackendError("Empty response from Ollama")
     return text
 
 
+def _stream_ollama(prompt, url, model, timeout):
+    """Stream the Ollama /api/generate endpoint, yielding text fragments."""
+    payload = _ollama_body(model, prompt, stream=True)
+    got_text = False
+    for line in _post_lines(url, payload, timeout, "Ollama"):
+        chunk = json.loads(line.decode("utf-8"))
+        if "error" in chunk:
+            raise AIBackendError(chunk["error"])
+        piece = chunk.get("response", "")
+        if piece:
+            got_text = got_text or not piece.isspace()
+            yield piece
+
+    if not got_text:
+        raise AIBackendError("Empty response from Ollama")
+
+
+_OAI_PATH = ("choices", 0, "message", "content")
+
+
 def _call_openai_compatible(prompt, url, model, timeout):
     """Call an OpenAI-compatible endpoint (LM Studio, etc.)."""
     payload = {
@@ -68,37 +327,71 @@ def _call_openai_compatible(prompt, url, model, timeout):
         "temperature": 0.7,
         "stream": False,
     }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url, data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            body = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.URLError as exc:
-        raise AIBackendError("Failed to reach LM Studio: %s" % exc) from exc
-    except socket.timeout as exc:
-        raise AIBackendError("LM Studio request timed out") from exc
+    body = _post_json(url, payload, timeout, "LM Studio")
 
+    text = body
     try:
-        text = body["choices"][0]["message"]["content"]
-    except (KeyError, IndexError):
+        for step in _OAI_PATH:
+            text = text[step]
+    except (KeyError, IndexError, TypeError):
         raise AIBackendError("Unexpected response format from LM Studio")
 
-    if not text.strip():
+    if not isinstance(text, str) or not text or text.isspace():
         raise AIBackendError("Empty response from LM Studio")
     return text
 
 
-def generate(prompt, backend=None, timeout_s=None):
+def _stream_openai_compatible(prompt, url, model, timeout):
+    """Stream an OpenAI-compatible endpoint (server-sent events)."""
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "stream": True,
+    }
+    got_text = False
+    for line in _post_lines(url, payload, timeout, "LM Studio"):
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            continue  # SSE comments and other fields
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            continue
+        try:
+            chunk = json.loads(data.decode("utf-8"))
+            piece = chunk["choices"][0]["delta"].get("content") or ""
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise AIBackendError("Unexpected response format from LM Studio")
+        if piece:
+            got_text = got_text or not piece.isspace()
+            yield piece
+
+    if not got_text:
+        raise AIBackendError("Empty response from LM Studio")
+
+
+# Completed generate() results are kept briefly, so repeating a quick-menu
+# action on the same text (e.g. after an undo) skips the model. Callers
+# that want a fresh answer pass use_cache=False, and generate_stream() is
+# never cached. Set AI_ASSISTANT_CACHE_DISABLE=1 to always ask the backend.
+CACHE_DISABLED = bool(os.environ.get("AI_ASSISTANT_CACHE_DISABLE"))
+_CACHE_MAX = 64
+_CACHE_TTL_S = 300.0
+
+# Both keyed by (backend, model, prompt digest); guarded by _inflight_lock.
+_inflight = {}  # key -> Future of the request in flight
+_results = collections.OrderedDict()  # key -> (time.monotonic(), text)
+_inflight_lock = threading.Lock()
+
+
+def generate(prompt, backend=None, timeout_s=None, use_cache=True):
     """Generate text using the selected AI backend.
 
     Args:
         prompt: The prompt text to send.
         backend: 'ollama' or 'lmstudio'. Defaults to 'ollama'.
         timeout_s: Request timeout in seconds.
+        use_cache: If False, don't answer from recently cached results.
     """
     if not prompt:
         raise AIBackendError("Prompt is empty")
@@ -107,7 +400,87 @@ def generate(prompt, backend=None, timeout_s=None):
     cfg = BACKENDS.get(backend, BACKENDS[DEFAULT_BACKEND])
     timeout = timeout_s or DEFAULT_TIMEOUT_S
 
+    # Identical requests already in flight (a repeated quick-menu action,
+    # or duplicate chunks from generate_many) share the one backend call.
+    key = (backend, cfg["model"],
+           hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest())
+    with _inflight_lock:
+        hit = None if CACHE_DISABLED or not use_cache else _results.get(key)
+        if hit is not None and time.monotonic() - hit[0] < _CACHE_TTL_S:
+            _results.move_to_end(key)
+            return hit[1]
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        if backend == "lmstudio":
+            text = _call_openai_compatible(
+                prompt, cfg["url"], cfg["model"], timeout)
+        else:
+            text = _call_ollama(prompt, cfg["url"], cfg["model"], timeout)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(text)
+        if not CACHE_DISABLED:
+            with _inflight_lock:
+                _results[key] = (time.monotonic(), text)
+                _results.move_to_end(key)
+                if len(_results) > _CACHE_MAX:
+                    _results.popitem(last=False)
+        return text
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+
+
+def generate_many(prompts, backend=None, timeout_s=None, use_cache=True):
+    """Generate a response for each prompt, returning them in order.
+
+    The requests are sent concurrently (up to one per pooled connection)
+    so a server that batches parallel requests, such as Ollama with
+    OLLAMA_NUM_PARALLEL, can process them together.
+    """
+    prompts = list(prompts)
+    if len(prompts) < 2:
+        return [generate(prompt, backend, timeout_s, use_cache)
+                for prompt in prompts]
+    with ThreadPoolExecutor(
+            max_workers=min(_POOL_MAXSIZE, len(prompts))) as ex:
+        return list(ex.map(
+            lambda prompt: generate(prompt, backend, timeout_s, use_cache),
+            prompts))
+
+
+async def agenerate(prompt, backend=None, timeout_s=None):
+    """Awaitable generate(), for callers running an asyncio event loop.
+
+    The request runs on the loop's default executor over the same pooled
+    connections, so concurrent awaits don't block the loop or each other.
+    """
+    import asyncio  # only needed by asyncio callers
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(generate, prompt, backend, timeout_s))
+
+
+def generate_stream(prompt, backend=None, timeout_s=None):
+    """Like generate(), but yield the response in fragments as they arrive."""
+    if not prompt:
+        raise AIBackendError("Prompt is empty")
+
+    backend = backend or DEFAULT_BACKEND
+    cfg = BACKENDS.get(backend, BACKENDS[DEFAULT_BACKEND])
+    timeout = timeout_s or DEFAULT_TIMEOUT_S
+
     if backend == "lmstudio":
-        return _call_openai_compatible(prompt, cfg["url"], cfg["model"], timeout)
+        yield from _stream_openai_compatible(
+            prompt, cfg["url"], cfg["model"], timeout)
     else:
-        return _call_ollama(prompt, cfg["url"], cfg["model"], timeout)
+        yield from _stream_ollama(prompt, cfg["url"], cfg["model"], timeout)
@@ -4,6 +4,10 @@
 
 """Prompt templates for the AI Assistant actions."""
 
+import os
+import re
+import unicodedata
+
 REWRITE_TEMPLATE = (
     "Rewrite the following text. Preserve meaning. Do not add new facts. "
     "Keep formatting neutral. Tone: {tone}. "
@@ -59,6 +63,90 @@ EXTRA_INSTRUCTIONS = (
 )
 
 
+# Selections are tidied before prompting: whitespace runs and control
+# characters cost tokens (and time) without adding meaning. Grammar is
+# left untouched, since stray spacing may be what the user wants fixed.
+KEEP_WHITESPACE = bool(os.environ.get("AI_ASSISTANT_KEEP_WHITESPACE"))
+
+_WS_RUN = re.compile(r"[ \t\u00a0]+")
+_NL_RUN = re.compile(r"\n(?:[ \t]*\n){2,}")  # 2+ blank or space-only lines
+_CTRL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufeff]")
+
+
+def _normalize(text):
+    """Collapse whitespace runs, drop control characters, NFC-normalize."""
+    text = _CTRL.sub("", text)
+    text = _WS_RUN.sub(" ", text)
+    text = _NL_RUN.sub("\n\n", text)
+    return unicodedata.normalize("NFC", text)
+
+
+def _split(template, *fields):
+    """Split a template into the literal text around its placeholders.
+
+    Placeholders must appear in the order given; returns one more piece
+    than there are fields.
+    """
+    pieces = []
+    for field in fields:
+        head, _, template = template.partition("{%s}" % field)
+        pieces.append(head)
+    pieces.append(template)
+    return tuple(pieces)
+
+
+# Templates are pre-split around their placeholders, so prompts are built
+# by concatenation without invoking the format parser.
+_EXTRA = _split(EXTRA_INSTRUCTIONS, "instructions")
+_REWRITE = _split(REWRITE_TEMPLATE, "tone", "selection")
+_TRANSLATE = _split(TRANSLATE_TEMPLATE, "language", "selection")
+_CUSTOM = _split(CUSTOM_TEMPLATE, "instructions", "selection")
+
+
+def _extra(custom_instructions):
+    if not custom_instructions:
+        return ""
+    return _EXTRA[0] + custom_instructions + _EXTRA[1]
+
+
+def _fixed(template):
+    """Builder for an action whose only placeholder is {selection}."""
+    prefix, suffix = _split(template, "selection")
+
+    def build(tone, selection, custom_instructions):
+        return prefix + selection + suffix + _extra(custom_instructions)
+    return build
+
+
+def _build_rewrite(tone, selection, custom_instructions):
+    head, mid, tail = _REWRITE
+    return head + tone + mid + selection + tail + _extra(custom_instructions)
+
+
+def _build_translate(tone, selection, custom_instructions):
+    head, mid, tail = _TRANSLATE
+    return head + (custom_instructions or "English") + mid + selection + tail
+
+
+def _build_custom(tone, selection, custom_instructions):
+    head, mid, tail = _CUSTOM
+    instructions = (custom_instructions
+                    or "Process the following text as instructed.")
+    return head + instructions + mid + selection + tail
+
+
+# Per-action prompt builders; unknown actions fall back to rewrite.
+_BUILDERS = {
+    "rewrite": _build_rewrite,
+    "summarize": _fixed(SUMMARIZE_TEMPLATE),
+    "grammar": _fixed(GRAMMAR_TEMPLATE),
+    "translate": _build_translate,
+    "continue": _fixed(CONTINUE_TEMPLATE),
+    "simplify": _fixed(SIMPLIFY_TEMPLATE),
+    "custom": _build_custom,
+}
+
+
 def build_prompt(action, tone, selection, custom_instructions=""):
     """Build a prompt for the specified action.
 
@@ -69,50 +157,18 @@ def build_prompt(action, tone, selection, custom_instructions=""):
         selection: The selected text to process
         custom_instructions: Optional extra instructions from the user.
                             For translate, this is the target language.
+
+    Returns an empty string when the selection is empty.
     """
     action = (action or "").strip().lower()
     tone = (tone or "Formal").strip()
-    selection = (selection or "").strip()
+    selection = selection or ""
     custom_instructions = (custom_instructions or "").strip()
-
-    if action == "custom":
-        if not custom_instructions:
-            custom_instructions = "Process the following text as instructed."
-        return CUSTOM_TEMPLATE.format(
-            instructions=custom_instructions,
-            selection=selection,
-        )
-
-    if action == "grammar":
-        prompt = GRAMMAR_TEMPLATE.format(selection=selection)
-        if custom_instructions:
-            prompt += EXTRA_INSTRUCTIONS.format(instructions=custom_instructions)
-        return prompt
-
-    if action == "translate":
-        language = custom_instructions if custom_instructions else "English"
-        prompt = TRANSLATE_TEMPLATE.format(language=language, selection=selection)
-        return prompt
-
-    if action == "continue":
-        prompt = CONTINUE_TEMPLATE.format(selection=selection)
-        if custom_instructions:
-            prompt += EXTRA_INSTRUCTIONS.format(instructions=custom_instructions)
-        return prompt
-
-    if action == "simplify":
-        prompt = SIMPLIFY_TEMPLATE.format(selection=selection)
-        if custom_instructions:
-            prompt += EXTRA_INSTRUCTIONS.format(instructions=custom_instructions)
-        return prompt
-
-    if action == "summarize":
-        prompt = SUMMARIZE_TEMPLATE.format(selection=selection)
-    else:
-        prompt = REWRITE_TEMPLATE.format(tone=tone, selection=selection)
-
-    # Append custom instructions if provided
-    if custom_instructions:
-        prompt += EXTRA_INSTRUCTIONS.format(instructions=custom_instructions)
-
-    return prompt
+    if not KEEP_WHITESPACE and action != "grammar":
+        selection = _normalize(selection)
+    selection = selection.strip()
+    if not selection:
+        return ""  # nothing to process; generate() rejects an empty prompt
+
+    builder = _BUILDERS.get(action, _build_rewrite)
+    return builder(tone, selection, custom_instructions)